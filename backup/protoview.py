@@ -30,32 +30,68 @@ Caveats (first iteration of PVTS emission):
 from __future__ import annotations
 
 import argparse
+import array
+import functools
+import itertools
 import json
+import math
 import os
-import re
 import shlex
+import shutil
 import signal
 import subprocess
 import sys
-import tempfile
+import threading
 import time
 from collections import Counter, deque
 from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    # POSIX only: used to enlarge tshark's stdout pipe.
+    import fcntl
+except ImportError:
+    fcntl = None
+
+try:
+    # Optional: faster PVTS serialization. Falls back to the stdlib json module.
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    # Optional: O(n) percentile selection for the dry-run report. Falls back to sorting.
+    import numpy as np
+except ImportError:
+    np = None
 
 
 TOOL_VERSION = "0.1.0"
 PVTS_VERSION = "0.1"
 
+# PVTS output is written through a large user-space buffer; it is flushed when full and on close.
+_OUTPUT_BUFFER_SIZE = 1 << 20
+# tshark output is read through a buffer of the same size (fewer read() calls on large captures).
+_TSHARK_READ_BUFFER_SIZE = 1 << 20
+# Dry-run rows are tallied in batches of this many rows.
+_DRY_RUN_BATCH_ROWS = 1 << 16
+# Requested kernel pipe size for tshark's stdout (the default is 64 KiB on Linux).
+_TSHARK_PIPE_SIZE = 1 << 20
+# Dissectors tshark can skip: none of them produces http.request/http.response records.
+# (SSDP is HTTP over UDP and matches the display filter, so it stays enabled; so does TLS, so
+# captures with a key log still yield decrypted HTTP.)
+_TSHARK_DISABLED_PROTOCOLS = ("dns", "mdns", "llmnr", "nbns", "quic")
+
 
 # ----------------------------
 # Common helpers
 # ----------------------------
 
-def _vprint(verbose: bool, msg: str) -> None:
+def _vprint(verbose: bool, *msgs: str) -> None:
+    # Several trace lines go out in a single write.
     if verbose:
-        print(f"[protoview] {msg}", file=sys.stderr)
+        sys.stderr.write("".join(f"[protoview] {msg}\n" for msg in msgs))
 
 
 def _is_interactive_stdout() -> bool:
@@ -65,82 +101,87 @@ def _is_interactive_stdout() -> bool:
         return False
 
 
+@functools.lru_cache(maxsize=8)
 def _which(cmd: str) -> Optional[str]:
-    for p in os.environ.get("PATH", "").split(os.pathsep):
-        cand = os.path.join(p, cmd)
-        if os.path.isfile(cand) and os.access(cand, os.X_OK):
-            return cand
-    return None
+    return shutil.which(cmd)
 
 
-def _read_stdin_to_tempfile(verbose: bool, suffix: str = ".pcapng") -> str:
-    """
-    Read stdin (binary) to a temp file and return the path.
-    Used because tshark prefers files over stdin for -r.
-    """
-    _vprint(verbose, "reading stdin into a temporary capture file...")
-    fd, path = tempfile.mkstemp(prefix="protoview-", suffix=suffix)
-    os.close(fd)
-    try:
-        with open(path, "wb") as f:
-            while True:
-                chunk = sys.stdin.buffer.read(1024 * 1024)
-                if not chunk:
-                    break
-                f.write(chunk)
-        _vprint(verbose, f"stdin saved to: {path}")
-        return path
-    except Exception:
-        try:
-            os.unlink(path)
-        except Exception:
-            pass
-        raise
+# Last formatted second: [epoch second, "YYYY-MM-DDTHH:MM:SS"].
+# Consecutive frames usually share a second, so only the fraction needs formatting.
+_ts_second_cache: List[Any] = [None, ""]
 
 
 def _utc_iso_from_epoch(epoch_s: str) -> str:
     """
     Convert tshark's frame.time_epoch to RFC3339/ISO timestamp in UTC.
+
+    Same output as datetime.fromtimestamp(v, tz=timezone.utc).isoformat() with a Z suffix
+    (microseconds rounded half-even; fraction omitted when zero), without building a datetime.
     """
     try:
         v = float(epoch_s)
     except Exception:
         # Fallback to "now" if parsing fails (should be rare).
         return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
-    dt = datetime.fromtimestamp(v, tz=timezone.utc)
-    # Use Z suffix.
-    return dt.isoformat().replace("+00:00", "Z")
+    frac, whole = math.modf(v)
+    sec = int(whole)
+    us = round(frac * 1e6)
+    if us >= 1000000:
+        sec += 1
+        us -= 1000000
+    elif us < 0:
+        sec -= 1
+        us += 1000000
+
+    cache = _ts_second_cache
+    if cache[0] != sec:
+        tm = time.gmtime(sec)
+        cache[1] = (
+            f"{tm.tm_year:04d}-{tm.tm_mon:02d}-{tm.tm_mday:02d}"
+            f"T{tm.tm_hour:02d}:{tm.tm_min:02d}:{tm.tm_sec:02d}"
+        )
+        cache[0] = sec
+    if us:
+        return f"{cache[1]}.{us:06d}Z"
+    return f"{cache[1]}Z"
 
 
 def _now_utc_iso() -> str:
     return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
 
 
+@functools.lru_cache(maxsize=256)
 def _normalize_content_type(ct: str) -> str:
+    """Lowercased media type without parameters (cached, like _classify_payload_kind)."""
     ct = (ct or "").strip().lower()
-    if ";" in ct:
-        ct = ct.split(";", 1)[0].strip()
+    semi = ct.find(";")
+    if semi != -1:
+        ct = ct[:semi].strip()
     return ct
 
 
+# Exact (normalized) content types treated as text, beyond the text/* and +json/+xml patterns.
+_TEXT_CONTENT_TYPES = frozenset((
+    "application/json",
+    "application/ld+json",
+    "application/schema+json",
+    "application/xml",
+    "application/x-www-form-urlencoded",
+))
+
+
+@functools.lru_cache(maxsize=256)
 def _classify_payload_kind(content_type: str) -> str:
     """
     Heuristic classifier for "text-ish" vs "binary-ish".
+    Cached: a capture has only a handful of distinct Content-Type values.
     """
     ct = _normalize_content_type(content_type)
     if not ct:
         return "unknown"
-    if ct.startswith("text/"):
+    if ct in _TEXT_CONTENT_TYPES:
         return "text"
-    if ct in ("application/json", "application/ld+json", "application/schema+json"):
-        return "text"
-    if ct.endswith("+json"):
-        return "text"
-    if ct in ("text/event-stream",):
-        return "text"
-    if ct in ("application/xml", "text/xml") or ct.endswith("+xml"):
-        return "text"
-    if ct == "application/x-www-form-urlencoded":
+    if ct.startswith("text/") or ct.endswith(("+json", "+xml")):
         return "text"
     return "binary"
 
@@ -157,6 +198,11 @@ def _safe_int(s: str) -> Optional[int]:
         return None
 
 
+def _utf8_len(s: str) -> int:
+    """UTF-8 size of s (unencodable characters dropped); ASCII text needs no encode to measure."""
+    return len(s) if s.isascii() else len(s.encode("utf-8", errors="ignore"))
+
+
 def _parse_headers_from_lines(lines: str) -> List[Dict[str, str]]:
     """
     Parse HTTP headers from tshark's http.request.line / http.response.line output.
@@ -170,45 +216,75 @@ def _parse_headers_from_lines(lines: str) -> List[Dict[str, str]]:
     """
     if not lines:
         return []
-    # Normalize line endings.
-    raw_lines = lines.replace("\r\n", "\n").split("\n")
 
     headers: List[Dict[str, str]] = []
-    for i, ln in enumerate(raw_lines):
-        ln = ln.strip("\r")
-        if i == 0:
-            # request/status line
-            continue
-        if not ln.strip():
-            continue
-        if ":" not in ln:
+    # Single split on '\n'; a '\r' left over from '\r\n' is trimmed from the name/value ends.
+    # The first line is the request/status line.
+    for ln in lines.split("\n")[1:]:
+        name, sep, value = ln.partition(":")
+        if not sep:
             continue
-        name, value = ln.split(":", 1)
-        headers.append({"name": name.strip(), "value": value.lstrip()})
+        headers.append({"name": sys.intern(name.strip()), "value": value.lstrip().rstrip("\r")})
     return headers
 
 
+# ASCII-only lowercasing keeps string length (and therefore indices) unchanged.
+_ASCII_LOWER = {c: c + 32 for c in range(ord("A"), ord("Z") + 1)}
+
+# Multipart bodies whose first part is at least this many chars are parsed in place by
+# _scan_multipart instead of being split.
+_MULTIPART_LARGE_PART = 1 << 14
+
+
 def _extract_boundary(content_type_header: str) -> Optional[str]:
     """
     Extract multipart boundary from Content-Type header value.
+
+    Finds boundary=VALUE or boundary="VALUE" (name is case-insensitive) with str.find,
+    where VALUE runs up to the next '"' or ';'.
     """
     if not content_type_header:
         return None
-    m = re.search(r'boundary="?([^";]+)"?', content_type_header, flags=re.IGNORECASE)
-    if not m:
-        return None
-    return m.group(1).strip()
+    s = content_type_header
+    if s.isascii():
+        lowered = s.lower()
+    else:
+        lowered = s.translate(_ASCII_LOWER)
+    n = len(s)
+    pos = lowered.find("boundary=")
+    while pos != -1:
+        i = pos + len("boundary=")
+        if i < n and s[i] == '"':
+            i += 1
+        # VALUE ends at the nearer of '"' and ';' (both located by C-level find).
+        q = s.find('"', i)
+        j = s.find(";", i)
+        if q != -1 and (j == -1 or q < j):
+            j = q
+        elif j == -1:
+            j = n
+        if j > i:
+            return s[i:j].strip()
+        pos = lowered.find("boundary=", pos + 1)
+    return None
 
 
-def _split_multipart(body: str, boundary: str) -> List[Tuple[List[Dict[str, str]], str]]:
+def _split_multipart(body: str, boundary: str) -> Iterable[Tuple[List[Dict[str, str]], str]]:
     """
     Very small multipart parser for first iteration (textual).
-    Returns list of (part_headers, part_body_text).
+    Returns (part_headers, part_body_text) pairs.
     """
     # RFC-ish boundary delimiters: --boundary and final --boundary--
     delim = f"--{boundary}"
     end_delim = f"--{boundary}--"
 
+    # First part of _MULTIPART_LARGE_PART chars or more: parse in place (see _scan_multipart).
+    first = body.find(delim)
+    if first != -1:
+        rest = first + len(delim)
+        if len(body) - rest >= _MULTIPART_LARGE_PART and body.find(delim, rest, rest + _MULTIPART_LARGE_PART) == -1:
+            return _scan_multipart(body, delim)
+
     # We work on text. This will not be perfect for binary parts; that's OK for v1.
     parts: List[Tuple[List[Dict[str, str]], str]] = []
 
@@ -233,17 +309,76 @@ def _split_multipart(body: str, boundary: str) -> List[Tuple[List[Dict[str, str]
             head, bdy = "", chunk
 
         hdrs: List[Dict[str, str]] = []
-        for ln in head.replace("\r\n", "\n").split("\n"):
-            ln = ln.strip()
-            if not ln or ":" not in ln:
+        for ln in head.split("\n"):
+            n, sep, v = ln.partition(":")
+            if not sep:
                 continue
-            n, v = ln.split(":", 1)
-            hdrs.append({"name": n.strip(), "value": v.lstrip()})
+            hdrs.append({"name": sys.intern(n.strip()), "value": v.strip()})
 
         parts.append((hdrs, bdy.strip("\r\n")))
     return parts
 
 
+def _scan_multipart(body: str, delim: str) -> Iterator[Tuple[List[Dict[str, str]], str]]:
+    """
+    _split_multipart for bodies with large parts: yields parts lazily, locating them with
+    str.find over the original body and slicing each part body out once (no intermediate
+    split/strip copies of the whole payload).
+    """
+    dlen = len(delim)
+    pos = 0
+    n = len(body)
+    while pos <= n:
+        nxt = body.find(delim, pos)
+        end = n if nxt == -1 else nxt
+
+        # Chunk body[pos:end] with surrounding whitespace trimmed (as str.strip() would).
+        a, b = pos, end
+        while a < b and body[a].isspace():
+            a += 1
+        while b > a and body[b - 1].isspace():
+            b -= 1
+        pos = end + dlen
+
+        if a == b or body.startswith("--", a, b):
+            # empty chunk or end marker
+            continue
+
+        # Separate headers and body by first blank line.
+        # Accept either \r\n\r\n or \n\n.
+        i = body.find("\r\n\r\n", a, b)
+        if i != -1:
+            j = i + 4
+        else:
+            i = body.find("\n\n", a, b)
+            j = i + 2
+        if i == -1:
+            # no clear split
+            i = j = a
+
+        # Body: drop CR/LF right after the separator (the chunk end is already trimmed).
+        while j < b and body[j] in "\r\n":
+            j += 1
+        yield _parse_part_headers(body[a:i]), body[j:b]
+
+
+def _parse_part_headers(head: str) -> List[Dict[str, str]]:
+    hdrs: List[Dict[str, str]] = []
+    if head:
+        for ln in head.split("\n"):
+            n, sep, v = ln.partition(":")
+            if not sep:
+                continue
+            hdrs.append({"name": sys.intern(n.strip()), "value": v.strip()})
+    return hdrs
+
+
+# Bodies whose average line (over the first _SSE_PROBE_CHARS) is longer than this are parsed
+# with _scan_sse_events (see below).
+_SSE_LONG_LINE_AVG = 128
+_SSE_PROBE_CHARS = 1 << 16
+
+
 def _parse_sse_events(body: str) -> List[Dict[str, Any]]:
     """
     Parse SSE events from a captured SSE response body.
@@ -255,45 +390,135 @@ def _parse_sse_events(body: str) -> List[Dict[str, Any]]:
 
     Returns list of dicts with keys: event, id, retry_ms, data
     """
+    # Many short lines (the usual event:/id:/data: shape): splitting is cheapest. Long lines
+    # (large data: payloads): a single find-based pass avoids copying each line several times.
+    probe = min(len(body), _SSE_PROBE_CHARS)
+    if probe > _SSE_LONG_LINE_AVG * (body.count("\n", 0, probe) + 1):
+        return _scan_sse_events(body)
+
     # Normalize
-    txt = body.replace("\r\n", "\n")
-    blocks = txt.split("\n\n")
+    txt = body.replace("\r\n", "\n") if "\r" in body else body
 
     out: List[Dict[str, Any]] = []
-    for blk in blocks:
-        blk = blk.strip("\n")
-        if not blk.strip():
-            continue
+    for blk in txt.split("\n\n"):
         ev: Dict[str, Any] = {}
         data_lines: List[str] = []
         for ln in blk.split("\n"):
-            if not ln or ln.startswith(":"):
+            if not ln or ln[0] == ":":
                 continue
-            if ":" not in ln:
+            k, sep, v = ln.partition(":")
+            if not sep:
                 continue
-            k, v = ln.split(":", 1)
             k = k.strip()
-            v = v.lstrip()
-            if k == "event":
-                ev["event"] = v
+            if k == "data":
+                data_lines.append(v.lstrip())
+            elif k == "event":
+                ev["event"] = v.lstrip()
             elif k == "id":
-                ev["id"] = v
+                ev["id"] = v.lstrip()
             elif k == "retry":
                 ms = _safe_int(v)
                 if ms is not None:
                     ev["retry_ms"] = ms
-            elif k == "data":
-                data_lines.append(v)
         ev["data"] = "\n".join(data_lines)
         # Only keep if there's data or some fields.
-        if ev.get("data") or any(k in ev for k in ("event", "id", "retry_ms")):
+        if ev["data"] or "event" in ev or "id" in ev or "retry_ms" in ev:
             out.append(ev)
     return out
 
 
+def _scan_sse_events(body: str) -> List[Dict[str, Any]]:
+    """
+    _parse_sse_events for bodies with long lines: a single pass over the body where lines end
+    at '\n' (one preceding '\r' is dropped) and fields are sliced straight out of the body.
+    """
+    out: List[Dict[str, Any]] = []
+    ev: Dict[str, Any] = {}
+    data_lines: List[str] = []
+
+    def finish_event() -> None:
+        nonlocal ev, data_lines
+        ev["data"] = "\n".join(data_lines)
+        # Only keep if there's data or some fields.
+        if ev["data"] or "event" in ev or "id" in ev or "retry_ms" in ev:
+            out.append(ev)
+        ev = {}
+        data_lines = []
+
+    n = len(body)
+    pos = 0
+    while True:
+        nl = body.find("\n", pos)
+        if nl == -1:
+            nl = end = n
+        else:
+            end = nl - 1 if nl > pos and body[nl - 1] == "\r" else nl
+
+        if end == pos:
+            # Blank line: dispatch the pending event.
+            if ev or data_lines:
+                finish_event()
+        elif body[pos] != ":":
+            colon = body.find(":", pos, end)
+            if colon != -1:
+                k = body[pos:colon].strip()
+                v = body[colon + 1:end].lstrip()
+                if k == "event":
+                    ev["event"] = v
+                elif k == "id":
+                    ev["id"] = v
+                elif k == "retry":
+                    ms = _safe_int(v)
+                    if ms is not None:
+                        ev["retry_ms"] = ms
+                elif k == "data":
+                    data_lines.append(v)
+
+        if nl == n:
+            break
+        pos = nl + 1
+
+    if ev or data_lines:
+        finish_event()
+    return out
+
+
+# Stdlib fallback encoder: built once (json.dumps constructs a new encoder per call when given
+# options) and compact, matching orjson's output. PVTS records are plain trees, so the
+# per-container cycle check is skipped.
+_JSON_ENCODER = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"), check_circular=False)
+
+
+def _dumps_jsonl(obj: Dict[str, Any]) -> bytes:
+    """
+    Serialize one PVTS record to UTF-8 JSON bytes (orjson when available).
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj)
+        except orjson.JSONEncodeError:
+            # e.g. integers wider than 64 bits; the stdlib encoder handles those.
+            pass
+    return _JSON_ENCODER.encode(obj).encode("utf-8")
+
+
 def _write_jsonl_line(out_f, obj: Dict[str, Any]) -> None:
-    out_f.write(json.dumps(obj, ensure_ascii=False) + "\n")
-    out_f.flush()
+    out_f.write(_dumps_jsonl(obj))
+    out_f.write(b"\n")
+
+
+def _encode_members(obj: Dict[str, Any]) -> bytes:
+    """
+    Serialize a non-empty dict without its enclosing braces ('"k":v,...'), for splicing into a record.
+    """
+    return _dumps_jsonl(obj)[1:-1]
+
+
+def _write_event(out_f, *members: bytes) -> None:
+    """
+    Write one JSONL record assembled from pre-encoded member fragments (see _encode_members).
+    """
+    out_f.write(b"{" + b",".join(members) + b"}\n")
 
 
 # ----------------------------
@@ -311,7 +536,28 @@ def _parse_port(s: str) -> int:
 
 
 def _build_bpf_filter(ports: List[int]) -> str:
-    ors = " or ".join(f"port {p}" for p in ports)
+    """
+    BPF filter for TCP traffic on any of ports.
+
+    Ports are sorted and de-duplicated; runs of 3+ consecutive ports become one portrange
+    (two comparisons per direction instead of one per port). A single term is not wrapped.
+    """
+    terms: List[str] = []
+    ordered = sorted(set(ports))
+    i = 0
+    while i < len(ordered):
+        j = i
+        while j + 1 < len(ordered) and ordered[j + 1] == ordered[j] + 1:
+            j += 1
+        if j - i >= 2:
+            terms.append(f"portrange {ordered[i]}-{ordered[j]}")
+        else:
+            terms.extend(f"port {p}" for p in ordered[i : j + 1])
+        i = j + 1
+    if len(terms) == 1:
+        # e.g. "tcp port 5173": no parenthesized disjunction for the common single-port case
+        return f"tcp {terms[0]}"
+    ors = " or ".join(terms)
     return f"tcp and ({ors})"
 
 
@@ -328,13 +574,17 @@ def cmd_capture(args: argparse.Namespace) -> int:
     if out == "stdout":
         out = "-"
 
-    _vprint(args.verbose, f"ports          : {ports}")
-    _vprint(args.verbose, f"bpf filter     : {bpf}")
-    _vprint(args.verbose, f"output capture : {'STDOUT' if out == '-' else out}")
-    _vprint(args.verbose, "interface      : lo")
-    _vprint(args.verbose, "transport      : tcp")
-    _vprint(args.verbose, "capturer       : dumpcap")
-    _vprint(args.verbose, "format         : pcapng (dumpcap default)")
+    if args.verbose:
+        _vprint(
+            True,
+            f"ports          : {ports}",
+            f"bpf filter     : {bpf}",
+            f"output capture : {'STDOUT' if out == '-' else out}",
+            "interface      : lo",
+            "transport      : tcp",
+            "capturer       : dumpcap",
+            "format         : pcapng (dumpcap default)",
+        )
 
     if out == "-" and _is_interactive_stdout():
         print(
@@ -347,12 +597,33 @@ def cmd_capture(args: argparse.Namespace) -> int:
         return 2
 
     dumpcap_cmd = ["dumpcap", "-i", "lo", "-f", bpf, "-w", out]
-    _vprint(args.verbose, f"exec           : {shlex.join(dumpcap_cmd)}")
+    if args.verbose:
+        _vprint(True, f"exec           : {shlex.join(dumpcap_cmd)}")
 
     proc: Optional[subprocess.Popen[bytes]] = None
+    # Set once the main thread has reaped dumpcap; stops a pending escalation.
+    exited = threading.Event()
+    escalation: Optional[threading.Thread] = None
+
+    def _escalate() -> None:
+        assert proc is not None
+        if exited.wait(3.0):
+            return
+        _vprint(args.verbose, "dumpcap did not exit in time; escalating to SIGTERM...")
+        try:
+            proc.terminate()
+        except ProcessLookupError:
+            return
+        if exited.wait(2.0):
+            return
+        _vprint(args.verbose, "dumpcap still running; escalating to SIGKILL...")
+        try:
+            proc.kill()
+        except ProcessLookupError:
+            return
 
     def _shutdown(signum: int, _frame) -> None:
-        nonlocal proc
+        nonlocal escalation
         if proc is None:
             return
         try:
@@ -360,33 +631,22 @@ def cmd_capture(args: argparse.Namespace) -> int:
         except ValueError:
             sig_name = str(signum)
 
-        _vprint(args.verbose, f"received signal : {sig_name} ({signum})")
-        _vprint(args.verbose, "forwarding to dumpcap for graceful shutdown...")
+        _vprint(
+            args.verbose,
+            f"received signal : {sig_name} ({signum})",
+            "forwarding to dumpcap for graceful shutdown...",
+        )
 
         try:
             proc.send_signal(signum)
         except ProcessLookupError:
             return
 
-        try:
-            proc.wait(timeout=3.0)
-            return
-        except subprocess.TimeoutExpired:
-            _vprint(args.verbose, "dumpcap did not exit in time; escalating to SIGTERM...")
-            try:
-                proc.terminate()
-            except ProcessLookupError:
-                return
-
-        try:
-            proc.wait(timeout=2.0)
-            return
-        except subprocess.TimeoutExpired:
-            _vprint(args.verbose, "dumpcap still running; escalating to SIGKILL...")
-            try:
-                proc.kill()
-            except ProcessLookupError:
-                return
+        # Don't wait here: the main thread is blocked in proc.wait() (holding Popen's wait lock)
+        # and reaps dumpcap. Escalation runs on a timer thread instead.
+        if escalation is None:
+            escalation = threading.Thread(target=_escalate, name="dumpcap-escalation", daemon=True)
+            escalation.start()
 
     old_sigint = signal.signal(signal.SIGINT, _shutdown)
     old_sigterm = signal.signal(signal.SIGTERM, _shutdown)
@@ -409,19 +669,21 @@ def cmd_capture(args: argparse.Namespace) -> int:
             )
             return 126
 
-        while True:
-            rc = proc.poll()
-            if rc is not None:
-                _vprint(args.verbose, f"dumpcap exit code: {rc}")
-                if rc != 0:
-                    print(
-                        "ERROR: dumpcap failed.\n"
-                        "If you expected this to work without sudo, your system may not be configured\n"
-                        "to allow non-root packet capture (e.g., dumpcap capabilities / wireshark group).",
-                        file=sys.stderr,
-                    )
-                return int(rc)
-            time.sleep(0.1)
+        # Block until dumpcap exits (no polling); signals are forwarded by _shutdown.
+        try:
+            rc = proc.wait()
+        finally:
+            exited.set()
+
+        _vprint(args.verbose, f"dumpcap exit code: {rc}")
+        if rc != 0:
+            print(
+                "ERROR: dumpcap failed.\n"
+                "If you expected this to work without sudo, your system may not be configured\n"
+                "to allow non-root packet capture (e.g., dumpcap capabilities / wireshark group).",
+                file=sys.stderr,
+            )
+        return int(rc)
     finally:
         signal.signal(signal.SIGINT, old_sigint)
         signal.signal(signal.SIGTERM, old_sigterm)
@@ -442,8 +704,12 @@ def _run_tshark_fields(
     Run tshark and yield each row as a list of field values (strings).
 
     We use:
-      -T fields with tab separation
-      -E occurrence=f (first) for stability
+      -T ek (one JSON object per packet) with -e for the requested fields
+      first occurrence of each field only, for stability
+      -o tcp.desegment_tcp_streams:TRUE so HTTP bodies are reassembled regardless of user prefs
+      --disable-protocol for dissectors the HTTP fields never need (less per-packet work)
+
+    Field values arrive unescaped (tabs/newlines in bodies survive intact). Missing fields are "".
     """
     tshark = _which("tshark")
     if not tshark:
@@ -453,29 +719,88 @@ def _run_tshark_fields(
         tshark,
         "-r",
         input_path,
+        "-o",
+        "tcp.desegment_tcp_streams:TRUE",
         "-Y",
         display_filter,
         "-T",
-        "fields",
-        "-E",
-        "separator=\t",
-        "-E",
-        "occurrence=f",
+        "ek",
     ]
+    for proto in _TSHARK_DISABLED_PROTOCOLS:
+        cmd.extend(["--disable-protocol", proto])
     for f in fields:
         cmd.extend(["-e", f])
 
-    _vprint(verbose, f"exec           : {shlex.join(cmd)}")
-
-    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    if verbose:
+        _vprint(True, f"exec           : {shlex.join(cmd)}")
+
+    # stdin is inherited, so `-r -` streams the capture straight from our stdin.
+    proc = subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        bufsize=_TSHARK_READ_BUFFER_SIZE,
+    )
     assert proc.stdout is not None
     assert proc.stderr is not None
 
-    for line in proc.stdout:
-        line = line.rstrip("\n")
-        yield line.split("\t")
+    # Let tshark run further ahead of the parser: it dissects concurrently in its own process, and a
+    # deeper pipe means it stalls less often while Python is busy serializing (Linux only).
+    if fcntl is not None and hasattr(fcntl, "F_SETPIPE_SZ"):
+        try:
+            fcntl.fcntl(proc.stdout.fileno(), fcntl.F_SETPIPE_SZ, _TSHARK_PIPE_SIZE)
+        except OSError:
+            pass  # above /proc/sys/fs/pipe-max-size; keep the default
+
+    # Drain stderr on a helper thread so a chatty tshark cannot block on a full stderr pipe
+    # while stdout is being consumed here.
+    stderr_chunks: List[bytes] = []
+    stderr_thread = threading.Thread(
+        target=lambda: stderr_chunks.append(proc.stderr.read()), name="tshark-stderr", daemon=True
+    )
+    stderr_thread.start()
 
-    stderr = proc.stderr.read()
+    loads = orjson.loads if orjson is not None else json.loads
+    # ek names -e fields with '_' for '.' (newer tshark keeps the dotted name); try both.
+    keys = [(f.replace(".", "_"), f) for f in fields]
+
+    finished = False
+    try:
+        for raw in iter(proc.stdout.readline, b""):
+            # Skip the bulk-API {"index": ...} header lines (and blanks) without parsing them.
+            if raw.startswith(b'{"index"') or not raw.strip():
+                continue
+            try:
+                obj = loads(raw)
+            except ValueError:
+                # orjson rejects invalid UTF-8 outright; decode leniently like the text path did.
+                try:
+                    obj = json.loads(raw.decode("utf-8", errors="replace"))
+                except ValueError:
+                    obj = None
+            layers = (obj.get("layers") or {}) if isinstance(obj, dict) else None
+            if not isinstance(layers, dict):
+                # Raised inside the try so the finally below still kills and reaps tshark.
+                raise RuntimeError(f"tshark produced malformed ek output: {raw[:200]!r}")
+            row: List[str] = []
+            for k, dotted in keys:
+                v = layers.get(k)
+                if v is None:
+                    v = layers.get(dotted)
+                if isinstance(v, list):
+                    v = v[0] if v else None
+                row.append("" if v is None else v if isinstance(v, str) else str(v))
+            yield row
+        finished = True
+    finally:
+        if not finished:
+            # Consumer stopped early (or failed): don't leave tshark running or unreaped.
+            proc.kill()
+            proc.stdout.close()
+            proc.wait()
+        stderr_thread.join()
+
+    stderr = b"".join(stderr_chunks).decode("utf-8", errors="replace")
     rc = proc.wait()
     if rc != 0:
         raise RuntimeError(f"tshark failed with exit code {rc}.\n{stderr.strip()}")
@@ -485,14 +810,15 @@ def _run_tshark_fields(
 # analyze --dry-run
 # ----------------------------
 
-@dataclass
+# slots=True needs Python 3.10; older interpreters get a plain dataclass.
+@dataclass(**({"slots": True} if sys.version_info >= (3, 10) else {}))
 class DryRunStats:
     http_requests: int = 0
     http_responses: int = 0
     sse_responses: int = 0
     multipart_responses: int = 0
 
-    content_length_values: List[int] = None  # type: ignore
+    content_length_values: "array.array[int]" = None  # type: ignore  # packed int64 ('q')
     payload_kind_counts: Counter = None  # type: ignore
     content_type_counts: Counter = None  # type: ignore
     content_encoding_counts: Counter = None  # type: ignore
@@ -501,7 +827,7 @@ class DryRunStats:
 
     def __post_init__(self) -> None:
         if self.content_length_values is None:
-            self.content_length_values = []
+            self.content_length_values = array.array("q")
         if self.payload_kind_counts is None:
             self.payload_kind_counts = Counter()
         if self.content_type_counts is None:
@@ -514,96 +840,176 @@ class DryRunStats:
             self.endpoint_bytes = Counter()
 
 
+def _tally_dry_run(stats: DryRunStats, rows: Iterable[List[str]]) -> None:
+    """
+    Add (method, uri, status, content-type, content-length, content-encoding) rows to stats.
+
+    Rows are taken in batches and counted per distinct raw value with Counter(zip(...)) (a C loop);
+    stripping, normalizing and classifying then run once per distinct value instead of once per row.
+    Distinct values are visited in first-seen order, so most_common() ties are unchanged.
+    Batching keeps memory bounded on large captures.
+    """
+    cl_values = stats.content_length_values
+    ep_counts = stats.endpoint_counts
+    ep_bytes = stats.endpoint_bytes
+    ct_counts = stats.content_type_counts
+    kind_counts = stats.payload_kind_counts
+    enc_counts = stats.content_encoding_counts
+
+    it = iter(rows)
+    while True:
+        batch = list(itertools.islice(it, _DRY_RUN_BATCH_ROWS))
+        if not batch:
+            return
+        n = len(batch)
+
+        # Transpose; short rows are padded with "" (zip_longest), missing columns with a column of "".
+        cols = list(itertools.zip_longest(*batch, fillvalue=""))[:6]
+        cols += [("",) * n] * (6 - len(cols))
+        methods, uris, codes, cts, cls, ces = cols
+
+        for (method, uri, cl_s), c in Counter(zip(methods, uris, cls)).items():
+            method = method.strip()
+            ep = f"{method} {uri.strip()}".strip() if method else ""
+            if ep:
+                stats.http_requests += c
+                ep_counts[ep] = ep_counts.get(ep, 0) + c
+            cl = _safe_int(cl_s)
+            if cl is None:
+                continue
+            try:
+                if c == 1:
+                    cl_values.append(cl)
+                else:
+                    cl_values.extend(array.array("q", (cl,)) * c)
+            except OverflowError:
+                # Not a plausible Content-Length (beyond int64); keep it out of the size stats.
+                continue
+            if ep:
+                ep_bytes[ep] = ep_bytes.get(ep, 0) + cl * c
+
+        stats.http_responses += sum(c for code, c in Counter(codes).items() if code.strip())
+
+        for ct_raw, c in Counter(cts).items():
+            ct_norm = _normalize_content_type(ct_raw)
+            if not ct_norm:
+                continue
+            ct_counts[ct_norm] = ct_counts.get(ct_norm, 0) + c
+            kind = _classify_payload_kind(ct_norm)
+            kind_counts[kind] = kind_counts.get(kind, 0) + c
+            if ct_norm == "text/event-stream":
+                stats.sse_responses += c
+            if ct_norm.startswith("multipart/"):
+                stats.multipart_responses += c
+
+        for enc_raw, c in Counter(ces).items():
+            enc = enc_raw.strip().lower()
+            if enc:
+                enc_counts[enc] = enc_counts.get(enc, 0) + c
+
+
 def _print_dry_run_report(stats: DryRunStats) -> None:
     def pct(part: int, whole: int) -> str:
         if whole <= 0:
             return "0%"
         return f"{(100.0 * part / whole):.1f}%"
 
-    print("# protoview analyze --dry-run report")
-    print()
-    print("## HTTP summary")
-    print(f"- HTTP requests:  {stats.http_requests}")
-    print(f"- HTTP responses: {stats.http_responses}")
+    # The report is assembled in memory and written with a single write().
+    lines: List[str] = []
+    emit = lines.append
+
+    emit("# protoview analyze --dry-run report")
+    emit("")
+    emit("## HTTP summary")
+    emit(f"- HTTP requests:  {stats.http_requests}")
+    emit(f"- HTTP responses: {stats.http_responses}")
     if stats.http_responses:
-        print(f"- SSE responses (Content-Type: text/event-stream): {stats.sse_responses} ({pct(stats.sse_responses, stats.http_responses)})")
-        print(f"- Multipart responses (Content-Type: multipart/*): {stats.multipart_responses} ({pct(stats.multipart_responses, stats.http_responses)})")
+        emit(f"- SSE responses (Content-Type: text/event-stream): {stats.sse_responses} ({pct(stats.sse_responses, stats.http_responses)})")
+        emit(f"- Multipart responses (Content-Type: multipart/*): {stats.multipart_responses} ({pct(stats.multipart_responses, stats.http_responses)})")
     else:
-        print(f"- SSE responses (Content-Type: text/event-stream): {stats.sse_responses}")
-        print(f"- Multipart responses (Content-Type: multipart/*): {stats.multipart_responses}")
+        emit(f"- SSE responses (Content-Type: text/event-stream): {stats.sse_responses}")
+        emit(f"- Multipart responses (Content-Type: multipart/*): {stats.multipart_responses}")
 
-    print()
-    print("## Payload size observations (best-effort)")
+    emit("")
+    emit("## Payload size observations (best-effort)")
     if stats.content_length_values:
-        vals = sorted(stats.content_length_values)
-        min_v = vals[0]
-        max_v = vals[-1]
-        p50 = vals[len(vals) // 2]
-        p90 = vals[int(len(vals) * 0.9) - 1] if len(vals) >= 10 else vals[-1]
-        p99 = vals[int(len(vals) * 0.99) - 1] if len(vals) >= 100 else vals[-1]
+        vals = stats.content_length_values
+        n = len(vals)
+        i50 = n // 2
+        i90 = int(n * 0.9) - 1 if n >= 10 else n - 1
+        i99 = int(n * 0.99) - 1 if n >= 100 else n - 1
+        if np is not None:
+            # Select only the needed order statistics (no full sort), straight from the packed buffer.
+            part = np.partition(np.frombuffer(vals, dtype=np.int64), [0, i50, i90, i99, n - 1])
+            min_v, p50, p90, p99, max_v = (int(part[i]) for i in (0, i50, i90, i99, n - 1))
+        else:
+            ordered = sorted(vals)
+            min_v, p50, p90, p99, max_v = (ordered[i] for i in (0, i50, i90, i99, n - 1))
         total = sum(vals)
-        print("- Source: primarily the HTTP Content-Length header (may be absent for chunked/SSE/streaming).")
-        print(f"- Observed Content-Length values: {len(vals)}")
-        print(f"- Total bytes (sum of observed Content-Length): {total}")
-        print(f"- Min / p50 / p90 / p99 / max: {min_v} / {p50} / {p90} / {p99} / {max_v}")
+        emit("- Source: primarily the HTTP Content-Length header (may be absent for chunked/SSE/streaming).")
+        emit(f"- Observed Content-Length values: {n}")
+        emit(f"- Total bytes (sum of observed Content-Length): {total}")
+        emit(f"- Min / p50 / p90 / p99 / max: {min_v} / {p50} / {p90} / {p99} / {max_v}")
     else:
-        print("- No Content-Length values were observed (common for chunked or streaming responses).")
+        emit("- No Content-Length values were observed (common for chunked or streaming responses).")
 
-    print()
-    print("## Payload kind (heuristic via Content-Type)")
+    emit("")
+    emit("## Payload kind (heuristic via Content-Type)")
     if stats.payload_kind_counts:
         for k, c in stats.payload_kind_counts.most_common():
-            print(f"- {k}: {c}")
+            emit(f"- {k}: {c}")
     else:
-        print("- No payload classifications available.")
+        emit("- No payload classifications available.")
 
-    print()
-    print("## Top Content-Types (normalized)")
+    emit("")
+    emit("## Top Content-Types (normalized)")
     if stats.content_type_counts:
         for ct, c in stats.content_type_counts.most_common(15):
-            print(f"- {ct}: {c}")
+            emit(f"- {ct}: {c}")
     else:
-        print("- No Content-Type headers observed.")
+        emit("- No Content-Type headers observed.")
 
-    print()
-    print("## Content-Encoding (compression hints)")
+    emit("")
+    emit("## Content-Encoding (compression hints)")
     if stats.content_encoding_counts:
         for enc, c in stats.content_encoding_counts.most_common(15):
-            print(f"- {enc}: {c}")
+            emit(f"- {enc}: {c}")
     else:
-        print("- No Content-Encoding headers observed.")
+        emit("- No Content-Encoding headers observed.")
 
-    print()
-    print("## Top endpoints by count (request method + target)")
+    emit("")
+    emit("## Top endpoints by count (request method + target)")
     if stats.endpoint_counts:
         for ep, c in stats.endpoint_counts.most_common(15):
-            print(f"- {ep}: {c}")
+            emit(f"- {ep}: {c}")
     else:
-        print("- No request endpoints observed.")
+        emit("- No request endpoints observed.")
 
-    print()
-    print("## Top endpoints by bytes (best-effort)")
+    emit("")
+    emit("## Top endpoints by bytes (best-effort)")
     if stats.endpoint_bytes:
         for ep, b in stats.endpoint_bytes.most_common(15):
-            print(f"- {ep}: {b} bytes (from Content-Length when present)")
+            emit(f"- {ep}: {b} bytes (from Content-Length when present)")
     else:
-        print("- No endpoint byte totals available (requires Content-Length observations).")
+        emit("- No endpoint byte totals available (requires Content-Length observations).")
 
-    print()
-    print("## Notes")
-    print("- This report is derived from tshark dissectors and may not reflect exact application payload bytes in all cases.")
-    print("- Streaming responses (SSE) often have no Content-Length; they can still be large over time.")
-    print("- Decompression is not performed in dry-run; Content-Encoding is reported as a hint only.")
+    emit("")
+    emit("## Notes")
+    emit("- This report is derived from tshark dissectors and may not reflect exact application payload bytes in all cases.")
+    emit("- Streaming responses (SSE) often have no Content-Length; they can still be large over time.")
+    emit("- Decompression is not performed in dry-run; Content-Encoding is reported as a hint only.")
+
+    lines.append("")
+    sys.stdout.write("\n".join(lines))
+    sys.stdout.flush()
 
 
 # ----------------------------
 # analyze (PVTS emitter)
 # ----------------------------
 
-@dataclass
-class _PendingReq:
-    req_id: str
-    root_id: str
+# A request awaiting its response: (req_id, root_id).
+_PendingReq = Tuple[str, str]
 
 
 def _make_trace_id() -> str:
@@ -612,9 +1018,14 @@ def _make_trace_id() -> str:
 
 
 def _open_output_stream(path: str):
+    """
+    Open the PVTS output as a binary stream with a large write buffer (records are UTF-8 bytes).
+    STDOUT is wrapped without taking ownership of fd 1 (closing the stream only flushes it).
+    """
     if path == "-" or path == "" or path is None:
-        return sys.stdout
-    return open(path, "w", encoding="utf-8")
+        sys.stdout.flush()
+        return open(sys.stdout.fileno(), "wb", buffering=_OUTPUT_BUFFER_SIZE, closefd=False)
+    return open(path, "wb", buffering=_OUTPUT_BUFFER_SIZE)
 
 
 def _make_endpoint(host: str, port: str, name: Optional[str] = None) -> Dict[str, Any]:
@@ -624,6 +1035,15 @@ def _make_endpoint(host: str, port: str, name: Optional[str] = None) -> Dict[str
     return ep
 
 
+@functools.lru_cache(maxsize=1024)
+def _shared_endpoint(host: str, port: str) -> Dict[str, Any]:
+    """
+    Memoized endpoint dict for frame src/dst. The same dict is reused by every event
+    with this (host, port), so callers must treat it as read-only.
+    """
+    return _make_endpoint(host, port)
+
+
 def _emit_pvts(
     *,
     verbose: bool,
@@ -665,9 +1085,15 @@ def _emit_pvts(
 
         "http.file_data",
     ]
+    n_fields = len(fields)
 
     # Pairing state: per tcp.stream queue of request ids (HTTP/1.x style).
-    pending: Dict[int, Deque[_PendingReq]] = {}
+    # tcp.stream ids are small dense integers, so queues live in a list at index tcp_stream + 1
+    # (slot 0 collects frames without a tcp.stream).
+    pending: List[Optional[Deque[_PendingReq]]] = []
+
+    # (tcp_stream, src host/port, dst host/port) -> (src_ep, dst_ep, conn); values are read-only.
+    conn_cache: Dict[Tuple[int, str, str, str, str], Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]] = {}
 
     # Monotonic event id counter.
     next_seq = 0
@@ -679,21 +1105,26 @@ def _emit_pvts(
         next_msg += 1
         return mid
 
+    # Members shared by every event record of this trace, encoded once.
+    event_head = _encode_members({"pvts": PVTS_VERSION, "type": "event", "trace_id": trace_id})
+
     # Write PVTS lines.
     out_f = _open_output_stream(output_path)
-    must_close = out_f is not sys.stdout
 
     try:
         # trace_start
+        capture: Dict[str, Any] = {}
+        if input_path != "-":
+            # capture.file is the filename "if known"; stdin has none, so the key is omitted.
+            capture["file"] = os.path.basename(input_path)
+        # stdin is typically `protoview capture` output, which dumpcap writes as pcapng.
+        capture["format"] = "pcapng" if input_path == "-" or input_path.lower().endswith(".pcapng") else "pcap"
         _write_jsonl_line(out_f, {
             "pvts": PVTS_VERSION,
             "type": "trace_start",
             "trace_id": trace_id,
             "ts": _now_utc_iso(),
-            "capture": {
-                "file": os.path.basename(input_path),
-                "format": "pcapng" if input_path.lower().endswith(".pcapng") else "pcap",
-            },
+            "capture": capture,
             "tool": {
                 "name": "protoview",
                 "version": TOOL_VERSION,
@@ -708,32 +1139,30 @@ def _emit_pvts(
             display_filter=display_filter,
             fields=fields,
         ):
-            # Unpack defensively
-            def g(i: int) -> str:
-                return row[i].strip() if i < len(row) else ""
-
-            frame_time = g(0)
-            tcp_stream_s = g(1)
-            ip_src = g(2) or "0.0.0.0"
-            src_port = g(3) or "0"
-            ip_dst = g(4) or "0.0.0.0"
-            dst_port = g(5) or "0"
-
-            req_method = g(6)
-            req_uri = g(7)
-            req_ver = g(8)
-            http_host = g(9)
-            req_lines = g(10)
-
-            resp_code = g(11)
-            resp_phrase = g(12)
-            resp_ver = g(13)
-            resp_lines = g(14)
-
-            content_type_raw = g(15)
-            content_length_s = g(16)
-            content_encoding = g(17)
-            file_data = g(18)
+            # Unpack defensively: pad/trim once to the requested field count.
+            if len(row) != n_fields:
+                row = (row + [""] * n_fields)[:n_fields]
+            (
+                frame_time, tcp_stream_s, ip_src, src_port, ip_dst, dst_port,
+                req_method, req_uri, req_ver, http_host, req_lines,
+                resp_code, resp_phrase, resp_ver, resp_lines,
+                content_type_raw, content_length_s, content_encoding,
+                file_data,
+            ) = row
+
+            # tshark does not pad field values; only free-text fields are trimmed.
+            # (Numeric fields go through int()/float()/_safe_int, which ignore surrounding whitespace.)
+            ip_src = sys.intern(ip_src or "0.0.0.0")
+            src_port = src_port or "0"
+            ip_dst = sys.intern(ip_dst or "0.0.0.0")
+            dst_port = dst_port or "0"
+            http_host = sys.intern(http_host)
+            req_lines = req_lines.strip()
+            resp_phrase = resp_phrase.strip()
+            resp_lines = resp_lines.strip()
+            content_type_raw = sys.intern(content_type_raw.strip())
+            content_encoding = sys.intern(content_encoding.strip())
+            file_data = file_data.strip()
 
             try:
                 tcp_stream = int(tcp_stream_s) if tcp_stream_s else -1
@@ -742,15 +1171,20 @@ def _emit_pvts(
 
             ts_iso = _utc_iso_from_epoch(frame_time)
 
-            # Build src/dst endpoints for this frame (as observed).
-            src_ep = {"host": ip_src, "port": int(src_port)}
-            dst_ep = {"host": ip_dst, "port": int(dst_port)}
-
-            conn_obj: Dict[str, Any] = {
-                "transport": "tcp",
-                "stream": max(tcp_stream, 0),
-                "five_tuple": {"src": src_ep, "dst": dst_ep},
-            }
+            # src/dst endpoints and conn for this frame (as observed); shared, read-only dicts.
+            # The five-tuple follows frame direction, so each stream has one entry per direction.
+            conn_key = (tcp_stream, ip_src, src_port, ip_dst, dst_port)
+            cached = conn_cache.get(conn_key)
+            if cached is None:
+                src_ep = _shared_endpoint(ip_src, src_port)
+                dst_ep = _shared_endpoint(ip_dst, dst_port)
+                conn_obj: Dict[str, Any] = {
+                    "transport": "tcp",
+                    "stream": max(tcp_stream, 0),
+                    "five_tuple": {"src": src_ep, "dst": dst_ep},
+                }
+                cached = conn_cache[conn_key] = (src_ep, dst_ep, conn_obj)
+            src_ep, dst_ep, conn_obj = cached
 
             # Determine if request or response.
             is_request = bool(req_method)
@@ -769,9 +1203,6 @@ def _emit_pvts(
                     headers.insert(0, {"name": "Host", "value": http_host})
 
                 ev = {
-                    "pvts": PVTS_VERSION,
-                    "type": "event",
-                    "trace_id": trace_id,
                     "id": eid,
                     "ts": ts_iso,
                     "seq": next_seq_local,
@@ -791,11 +1222,15 @@ def _emit_pvts(
                 }
 
                 # Track request for pairing with later response.
-                if tcp_stream not in pending:
-                    pending[tcp_stream] = deque()
-                pending[tcp_stream].append(_PendingReq(req_id=eid, root_id=eid))
-
-                _write_jsonl_line(out_f, ev)
+                slot = tcp_stream + 1
+                if slot >= len(pending):
+                    pending.extend([None] * (slot + 1 - len(pending)))
+                q = pending[slot]
+                if q is None:
+                    q = pending[slot] = deque()
+                q.append((eid, eid))
+
+                _write_event(out_f, event_head, _encode_members(ev))
                 event_count += 1
                 continue
 
@@ -810,10 +1245,10 @@ def _emit_pvts(
                 # Correlate to a pending request on same tcp_stream (best-effort).
                 in_resp_to: Optional[str] = None
                 root: Optional[str] = None
-                if tcp_stream in pending and pending[tcp_stream]:
-                    pr = pending[tcp_stream].popleft()
-                    in_resp_to = pr.req_id
-                    root = pr.root_id
+                slot = tcp_stream + 1
+                q = pending[slot] if slot < len(pending) else None
+                if q:
+                    in_resp_to, root = q.popleft()
 
                 links_obj: Dict[str, Any] = {}
                 if in_resp_to:
@@ -822,7 +1257,7 @@ def _emit_pvts(
                     links_obj["root"] = root
 
                 ct_norm = _normalize_content_type(content_type_raw)
-                kind = _classify_payload_kind(content_type_raw)
+                kind = _classify_payload_kind(ct_norm)
 
                 # Payload policy for first iteration:
                 # - text: include file_data if present
@@ -853,9 +1288,6 @@ def _emit_pvts(
                     payload_obj.pop("mime", None)
 
                 ev = {
-                    "pvts": PVTS_VERSION,
-                    "type": "event",
-                    "trace_id": trace_id,
                     "id": eid,
                     "ts": ts_iso,
                     "seq": next_seq_local,
@@ -878,16 +1310,35 @@ def _emit_pvts(
                 if ev.get("links") is None:
                     ev.pop("links", None)
 
-                _write_jsonl_line(out_f, ev)
+                _write_event(out_f, event_head, _encode_members(ev))
                 event_count += 1
 
+                is_sse = ct_norm == "text/event-stream"
+                is_multipart = ct_norm.startswith("multipart/")
+                if not (file_data and (is_sse or is_multipart)):
+                    continue
+
+                # Members that are identical for every SSE/multipart sub-event of this response, encoded once.
+                # ts is best-effort: same frame timestamp (we don't have per-event ts here).
+                links = {"parent": eid}
+                if root:
+                    links["root"] = root
+                sub_ts = _encode_members({"ts": ts_iso})
+                sub_ctx = _encode_members({
+                    "conn": {"transport": "tcp", "stream": max(tcp_stream, 0)},
+                    "src": src_ep,
+                    "dst": dst_ep,
+                    "links": links,
+                })
+
                 # SSE sub-events (best-effort): only if text/event-stream AND file_data present AND not suppressed as binary.
-                if ct_norm == "text/event-stream" and file_data:
+                if is_sse:
                     # If we suppressed binary payload, we still parse nothing.
                     if not (kind == "binary" and not display_binary_payload):
                         sse_events = _parse_sse_events(file_data)
+
                         # Link SSE events to parent response (this response event).
-                        for idx, sse in enumerate(sse_events):
+                        for sse in sse_events:
                             sid = new_id()
                             next_seq_local = next_seq
                             next_seq += 1
@@ -910,35 +1361,19 @@ def _emit_pvts(
                                 "truncated": False,
                             }
 
-                            links = {"parent": eid}
-                            if root:
-                                links["root"] = root
-                            if in_resp_to:
-                                # root already points to request; keep root.
-                                pass
-
-                            sev = {
-                                "pvts": PVTS_VERSION,
-                                "type": "event",
-                                "trace_id": trace_id,
-                                "id": sid,
-                                "ts": ts_iso,  # best-effort: same frame timestamp (we don't have per-event ts here)
-                                "seq": next_seq_local,
-                                "kind": "sse_event",
-                                "summary": f"SSE {sse.get('event') or 'message'}".strip(),
-                                "conn": {"transport": "tcp", "stream": max(tcp_stream, 0)},
-                                "src": src_ep,
-                                "dst": dst_ep,
-                                "links": links,
-                                "proto": {"sse": sse_proto} if sse_proto else {"sse": {}},
-                                "payload": sse_payload,
-                            }
-
-                            _write_jsonl_line(out_f, sev)
+                            # ids are "m%06d" (ASCII), so id/seq are formatted directly as bytes.
+                            _write_event(
+                                out_f,
+                                event_head,
+                                b'"id":"%s",%s,"seq":%d,"kind":"sse_event"' % (sid.encode("ascii"), sub_ts, next_seq_local),
+                                _encode_members({"summary": f"SSE {sse.get('event') or 'message'}".strip()}),
+                                sub_ctx,
+                                _encode_members({"proto": {"sse": sse_proto}, "payload": sse_payload}),
+                            )
                             event_count += 1
 
                 # Multipart sub-events (best-effort)
-                if ct_norm.startswith("multipart/") and file_data:
+                if is_multipart:
                     boundary = _extract_boundary(content_type_raw)
                     if boundary:
                         parts = _split_multipart(file_data, boundary)
@@ -953,7 +1388,8 @@ def _emit_pvts(
                                 if h["name"].lower() == "content-type":
                                     part_ct = h["value"]
                                     break
-                            part_kind = _classify_payload_kind(part_ct)
+                            part_ct_norm = _normalize_content_type(part_ct)
+                            part_kind = _classify_payload_kind(part_ct_norm)
 
                             # Payload policy for multipart part:
                             # - If binary and not allowed, omit with placeholder (and mark truncated true).
@@ -962,14 +1398,15 @@ def _emit_pvts(
                                 "encoding": "identity",
                             }
                             if pbody:
+                                size_bytes = _utf8_len(pbody)
                                 if part_kind == "binary" and not display_binary_payload:
                                     part_payload["data"] = "<<binary payload omitted (use --display-binary-payload)>>"
                                     part_payload["truncated"] = True
-                                    part_payload["size_bytes"] = len(pbody.encode("utf-8", errors="ignore"))
+                                    part_payload["size_bytes"] = size_bytes
                                 else:
                                     part_payload["data"] = pbody
                                     part_payload["truncated"] = False
-                                    part_payload["size_bytes"] = len(pbody.encode("utf-8", errors="ignore"))
+                                    part_payload["size_bytes"] = size_bytes
                             else:
                                 part_payload["data"] = ""
                                 part_payload["truncated"] = False
@@ -978,34 +1415,25 @@ def _emit_pvts(
                             if part_payload.get("mime") is None:
                                 part_payload.pop("mime", None)
 
-                            links = {"parent": eid}
-                            if root:
-                                links["root"] = root
-
-                            pev = {
-                                "pvts": PVTS_VERSION,
-                                "type": "event",
-                                "trace_id": trace_id,
-                                "id": pid,
-                                "ts": ts_iso,
-                                "seq": next_seq_local,
-                                "kind": "multipart_part",
-                                "summary": f"part[{pidx}] {_normalize_content_type(part_ct) or ''}".strip(),
-                                "conn": {"transport": "tcp", "stream": max(tcp_stream, 0)},
-                                "src": src_ep,
-                                "dst": dst_ep,
-                                "links": links,
-                                "proto": {
-                                    "multipart": {
-                                        "boundary": boundary,
-                                        "part_index": pidx,
-                                        "part_headers": phdrs,
-                                    }
-                                },
-                                "payload": part_payload,
-                            }
-
-                            _write_jsonl_line(out_f, pev)
+                            _write_event(
+                                out_f,
+                                event_head,
+                                b'"id":"%s",%s,"seq":%d,"kind":"multipart_part"' % (pid.encode("ascii"), sub_ts, next_seq_local),
+                                _encode_members({
+                                    "summary": f"part[{pidx}] {part_ct_norm or ''}".strip(),
+                                }),
+                                sub_ctx,
+                                _encode_members({
+                                    "proto": {
+                                        "multipart": {
+                                            "boundary": boundary,
+                                            "part_index": pidx,
+                                            "part_headers": phdrs,
+                                        }
+                                    },
+                                    "payload": part_payload,
+                                }),
+                            )
                             event_count += 1
 
                 continue
@@ -1018,14 +1446,17 @@ def _emit_pvts(
             "ts": _now_utc_iso(),
             "stats": {"events": event_count},
         })
+        # Flush here rather than only in `finally`, so a failed final write (disk full, closed pipe)
+        # is reported instead of swallowed.
+        out_f.flush()
         return 0
 
     finally:
-        if must_close:
-            try:
-                out_f.close()
-            except Exception:
-                pass
+        # Release the buffered output (also on error paths).
+        try:
+            out_f.close()
+        except Exception:
+            pass
 
 
 def cmd_analyze(args: argparse.Namespace) -> int:
@@ -1040,15 +1471,13 @@ def cmd_analyze(args: argparse.Namespace) -> int:
         print("ERROR: --output cannot be used with --dry-run (dry-run prints report to stdout).", file=sys.stderr)
         return 2
 
-    # Input defaults to stdin.
-    input_path: Optional[str] = args.input
-    temp_path: Optional[str] = None
+    # Input defaults to stdin, which tshark reads directly (-r -); it is only ever run once per
+    # invocation, so the capture is never buffered to disk.
+    input_path: str = args.input or "-"
+    if input_path == "-":
+        _vprint(args.verbose, "reading capture from stdin (piped to tshark)...")
 
     try:
-        if not input_path or input_path == "-":
-            temp_path = _read_stdin_to_tempfile(args.verbose, suffix=".pcapng")
-            input_path = temp_path
-
         if args.dry_run:
             # Dry-run report
             stats = DryRunStats()
@@ -1062,46 +1491,15 @@ def cmd_analyze(args: argparse.Namespace) -> int:
                 "http.content_encoding",
             ]
 
-            for row in _run_tshark_fields(
-                verbose=args.verbose,
-                input_path=input_path,
-                display_filter=display_filter,
-                fields=fields,
-            ):
-                method = row[0].strip() if len(row) > 0 else ""
-                uri = row[1].strip() if len(row) > 1 else ""
-                resp_code = row[2].strip() if len(row) > 2 else ""
-                content_type = row[3].strip() if len(row) > 3 else ""
-                content_length_s = row[4].strip() if len(row) > 4 else ""
-                content_encoding = row[5].strip() if len(row) > 5 else ""
-
-                if method:
-                    stats.http_requests += 1
-                    ep = f"{method} {uri or ''}".strip()
-                    stats.endpoint_counts[ep] += 1
-
-                if resp_code:
-                    stats.http_responses += 1
-
-                ct_norm = _normalize_content_type(content_type)
-                if ct_norm:
-                    stats.content_type_counts[ct_norm] += 1
-                    kind = _classify_payload_kind(ct_norm)
-                    stats.payload_kind_counts[kind] += 1
-                    if ct_norm == "text/event-stream":
-                        stats.sse_responses += 1
-                    if ct_norm.startswith("multipart/"):
-                        stats.multipart_responses += 1
-
-                if content_encoding:
-                    stats.content_encoding_counts[content_encoding.strip().lower()] += 1
-
-                cl = _safe_int(content_length_s)
-                if cl is not None:
-                    stats.content_length_values.append(cl)
-                    if method:
-                        ep = f"{method} {uri or ''}".strip()
-                        stats.endpoint_bytes[ep] += cl
+            _tally_dry_run(
+                stats,
+                _run_tshark_fields(
+                    verbose=args.verbose,
+                    input_path=input_path,
+                    display_filter=display_filter,
+                    fields=fields,
+                ),
+            )
 
             _print_dry_run_report(stats)
             return 0
@@ -1118,12 +1516,6 @@ def cmd_analyze(args: argparse.Namespace) -> int:
     except RuntimeError as e:
         print(f"ERROR: {e}", file=sys.stderr)
         return 2
-    finally:
-        if temp_path:
-            try:
-                os.unlink(temp_path)
-            except Exception:
-                pass
 
 
 # ----------------------------
@@ -4,17 +4,45 @@ import csv
 import argparse
 import os
 import html
+import math
 
 # Hardcoded filenames for spec maps
 JSONRPC_MAP_FILE = "jsonrpc-specmap.csv"
 A2UI_MAP_FILE = "a2ui-specmap.csv"
 
+# Constant HTML fragments of the tree
+DICT_OPEN = '<span class="toggle">▼</span><span style="color: grey;">{</span><div class="collapsible">'
+DICT_CLOSE = '</div><span style="color: grey;">}</span>'
+LIST_OPEN = '<span class="toggle">▼</span><span style="color: grey;">[</span><div class="collapsible">'
+LIST_CLOSE = '</div><span style="color: grey;">]</span>'
+LINE_OPEN = '<div class="line" style="margin-left: 20px;">'
+LINE_CLOSE_LAST = '</div>'
+LINE_CLOSE = ',</div>'
+VAL_OPEN = '<span class="val" style="color: #b5cea8;">'
+
+# Tree output is handed to the writer every this many fragments (~64-128 KiB)
+FLUSH_FRAGMENTS = 2048
+
+def _float_html(x):
+    # json.dumps spells non-finite floats NaN/Infinity; finite ones match repr()
+    return repr(x) if math.isfinite(x) else json.dumps(x)
+
+# Terminal value -> escaped HTML text, by exact type; same result as html.escape(json.dumps(v)).
+# Only strings can contain characters that need HTML escaping.
+TERMINAL_HTML = {
+    bool: lambda v: "true" if v else "false",
+    type(None): lambda v: "null",
+    int: int.__repr__,
+    float: _float_html,
+    str: lambda v: html.escape(json.encoder.encode_basestring_ascii(v)),
+}
+
 def log_err(msg):
     """Logs errors to stderr to keep stdout clean for HTML."""
     print(f"LOG: {msg}", file=sys.stderr)
 
 def load_spec_map(filename):
-    """Loads CSV spec map into a dictionary."""
+    """Loads CSV spec map into a dictionary (descriptions are HTML-escaped once, here)."""
     spec_map = {}
     if not os.path.exists(filename):
         log_err(f"Warning: {filename} not found. Tooltips will be limited.")
@@ -23,7 +51,7 @@ def load_spec_map(filename):
         with open(filename, mode='r', encoding='utf-8') as f:
             reader = csv.DictReader(f)
             for row in reader:
-                spec_map[row['Symbol']] = row.get('Description', '')
+                spec_map[row['Symbol']] = html.escape(row.get('Description', ''))
         return spec_map
     except Exception as e:
         log_err(f"Error reading {filename}: {e}")
@@ -37,50 +65,82 @@ class Protocolorizer:
         self.a2ui_map = a2ui_map
 
     def get_html_tree(self, data, protocol="jsonrpc", indent=0):
-        """Recursively builds the HTML string for the JSON tree."""
-        html_out = ""
-        
-        # Check for Gateway transition to A2UI
-        current_protocol = protocol
+        """Builds the HTML string for the JSON tree."""
+        chunks = []
+        self.write_html_tree(data, chunks.append, protocol)
+        return "".join(chunks)
+
+    def write_html_tree(self, data, write, protocol="jsonrpc"):
+        """Writes the HTML for the JSON tree to write() in chunks (iteratively, no recursion limit)."""
+        out = []
+        # Per-protocol context: (name, key color, spec map, key -> '<div class="line" ...><span class="key" ...>"key"</span>: ').
+        # Only the jsonrpc context probes for the Gateway transition; once in a2ui it is sticky for the whole subtree.
+        rpc = ("jsonrpc", self.rpc_color, self.rpc_map, {})
+        a2ui = ("a2ui", self.a2ui_color, self.a2ui_map, {})
         if protocol == "jsonrpc":
-            if isinstance(data, dict) and ("surfaces" in data or "components" in data):
-                current_protocol = "a2ui"
-            elif isinstance(data, list) and len(data) > 0:
-                # Peek for batch items containing A2UI
-                if isinstance(data[0], dict) and ("surfaces" in data[0] or "components" in data[0]):
-                    current_protocol = "a2ui"
-
-        color = self.rpc_color if current_protocol == "jsonrpc" else self.a2ui_color
-        spec_map = self.rpc_map if current_protocol == "jsonrpc" else self.a2ui_map
-
-        if isinstance(data, dict):
-            html_out += '<span class="toggle">▼</span><span style="color: grey;">{</span><div class="collapsible">'
-            items = list(data.items())
-            for i, (k, v) in enumerate(items):
-                desc = html.escape(spec_map.get(k, f"Key in {current_protocol} context"))
-                comma = "," if i < len(items) - 1 else ""
-                
-                html_out += f'<div class="line" style="margin-left: 20px;">'
-                html_out += f'<span class="key" style="color: {color};" title="{desc}">"{html.escape(k)}"</span>: '
-                html_out += self.get_html_tree(v, current_protocol, indent + 1)
-                html_out += f'{comma}</div>'
-            html_out += '</div><span style="color: grey;">}</span>'
-            
-        elif isinstance(data, list):
-            html_out += '<span class="toggle">▼</span><span style="color: grey;">[</span><div class="collapsible">'
-            for i, item in enumerate(data):
-                comma = "," if i < len(data) - 1 else ""
-                html_out += f'<div class="line" style="margin-left: 20px;">'
-                html_out += self.get_html_tree(item, current_protocol, indent + 1)
-                html_out += f'{comma}</div>'
-            html_out += '</div><span style="color: grey;">]</span>'
-            
+            ctx = rpc
+        elif protocol == "a2ui":
+            ctx = a2ui
         else:
-            # Terminal values
-            val_str = json.dumps(data)
-            html_out += f'<span class="val" style="color: #b5cea8;">{html.escape(val_str)}</span>'
-            
-        return html_out
+            ctx = (protocol, self.a2ui_color, self.a2ui_map, {})
+        # Work stack: str items are HTML fragments to emit, tuples are (node, context) to expand.
+        stack = [(data, ctx)]
+        # Module-level lookups used per node, bound as locals
+        esc, terminal_html = html.escape, TERMINAL_HTML.get
+        while stack:
+            work = stack.pop()
+            if type(work) is str:
+                out.append(work)
+                if len(out) >= FLUSH_FRAGMENTS:
+                    write("".join(out))
+                    out.clear()
+                continue
+            data, ctx = work
+
+            if isinstance(data, dict):
+                # Check for Gateway transition to A2UI
+                if ctx is rpc and ("surfaces" in data or "components" in data):
+                    ctx = a2ui
+                current_protocol, color, spec_map, key_spans = ctx
+                out.append(DICT_OPEN)
+                # Children are pushed in reverse so they pop in document order;
+                # the first one pushed is the last entry, the only one without a comma.
+                stack.append(DICT_CLOSE)
+                line_close = LINE_CLOSE_LAST
+                for k, v in reversed(data.items()):
+                    stack.append(line_close)
+                    line_close = LINE_CLOSE
+                    stack.append((v, ctx))
+                    span = key_spans.get(k)
+                    if span is None:
+                        desc = spec_map.get(k)
+                        if desc is None:
+                            desc = esc(f"Key in {current_protocol} context")
+                        span = LINE_OPEN + f'<span class="key" style="color: {color};" title="{desc}">"{esc(k)}"</span>: '
+                        key_spans[k] = span
+                    stack.append(span)
+
+            elif isinstance(data, list):
+                # Peek for batch items containing A2UI
+                if ctx is rpc and data and isinstance(data[0], dict) and ("surfaces" in data[0] or "components" in data[0]):
+                    ctx = a2ui
+                out.append(LIST_OPEN)
+                stack.append(LIST_CLOSE)
+                line_close = LINE_CLOSE_LAST
+                for item in reversed(data):
+                    stack.append(line_close)
+                    line_close = LINE_CLOSE
+                    stack.append((item, ctx))
+                    stack.append(LINE_OPEN)
+
+            else:
+                # Terminal values
+                fmt = terminal_html(type(data))
+                val_html = fmt(data) if fmt is not None else esc(json.dumps(data))
+                out.append(f'{VAL_OPEN}{val_html}</span>')
+
+        if out:
+            write("".join(out))
 
 def main():
     parser = argparse.ArgumentParser(description="pvprotocolorizer: Protocol-aware JSON visualizer.")
@@ -103,12 +163,11 @@ def main():
     rpc_map = load_spec_map(JSONRPC_MAP_FILE)
     a2ui_map = load_spec_map(A2UI_MAP_FILE)
 
-    # Generate content
+    # Generate content, streamed: page head, tree (in chunks), page tail
     engine = Protocolorizer(args.rpc_color, args.a2ui_color, rpc_map, a2ui_map)
-    tree_content = engine.get_html_tree(raw_data)
 
     # HTML Boilerplate
-    html_page = f"""<!DOCTYPE html>
+    page_head = f"""<!DOCTYPE html>
 <html>
 <head>
     <meta charset="UTF-8">
@@ -123,25 +182,33 @@ def main():
     </style>
 </head>
 <body>
-    <div id="tree">{tree_content}</div>
+    <div id="tree">"""
+    page_tail = """</div>
     <script>
-        document.addEventListener('click', function(e) {{
-            if (e.target.classList.contains('toggle')) {{
+        document.addEventListener('click', function(e) {
+            if (e.target.classList.contains('toggle')) {
                 const content = e.target.nextElementSibling.nextElementSibling;
-                if (content.classList.contains('collapsed')) {{
+                if (content.classList.contains('collapsed')) {
                     content.classList.remove('collapsed');
                     e.target.innerText = '▼';
-                }} else {{
+                } else {
                     content.classList.add('collapsed');
                     e.target.innerText = '▶';
-                }}
-            }}
-        }});
+                }
+            }
+        });
     </script>
 </body>
 </html>"""
 
-    sys.stdout.write(html_page)
+    sys.stdout.flush()
+    with open(sys.stdout.fileno(), "wb", buffering=1 << 20, closefd=False) as out:
+        def write(text):
+            out.write(text.encode("utf-8"))
+
+        write(page_head)
+        engine.write_html_tree(raw_data, write)
+        write(page_tail)
 
 if __name__ == "__main__":
     main()